@@ -3,8 +3,10 @@ import requests_cache
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from retry_requests import retry
 import requests  # Added for geocoding
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, wait
 import numpy as np # Keep numpy import, it's used by openmeteo client
 
 # --- WMO Weather Code Mapping ---
@@ -39,8 +41,81 @@ WMO_CODES = {
     99: "Thunderstorm, heavy hail ⛈️",
 }
 
+# Lookup arrays indexed directly by WMO code (codes are 0-99), so descriptions
+# and icons come from plain array indexing rather than dict lookups and splits.
+# The extra slot at WMO_UNKNOWN holds the fallback for missing or unknown codes.
+WMO_UNKNOWN = 100
+WMO_DESC = np.full(WMO_UNKNOWN + 1, "N/A", dtype=object)
+WMO_ICON = np.full(WMO_UNKNOWN + 1, "❓", dtype=object)
+for _code, _desc in WMO_CODES.items():
+    WMO_DESC[_code] = _desc
+    WMO_ICON[_code] = _desc.split(" ")[-1]  # The emoji is the last token
+
+def wmo_index(codes):
+    """Maps WMO code(s) to WMO_DESC/WMO_ICON slots, sending NaN and out-of-range codes to WMO_UNKNOWN."""
+    codes = np.asarray(codes, dtype=np.float64)
+    valid = np.isfinite(codes) & (codes >= 0) & (codes < WMO_UNKNOWN)
+    return np.where(valid, codes, WMO_UNKNOWN).astype(np.intp)
+
+# --- Shared HTTP Sessions ---
+# The sessions below are process-wide and shared by every user session, so each
+# host's connection pool is sized for concurrent script runs rather than one user
+HTTP_POOL_MAXSIZE = 16
+
+def _make_http_adapter():
+    """
+    Pooled, retrying adapter for one of the shared sessions, so kept-alive
+    connections are reused across requests and reruns.
+    """
+    retries = Retry(total=5, backoff_factor=0.2, status_forcelist=(500, 502, 504))
+    return HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retries)
+
+def _mount_adapter(session):
+    """Mounts a fresh pooled adapter for both URL schemes and returns the session."""
+    adapter = _make_http_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def _get_openmeteo_client():
+    """
+    Builds the cached + retrying Open-Meteo client once per process.
+    Streamlit reruns the whole script on every interaction, so this avoids
+    reopening the SQLite cache and remounting the retry adapter each time.
+    """
+    cache_session = requests_cache.CachedSession('.cache', expire_after=900, allowable_methods=('GET',))
+    return openmeteo_requests.Client(session=_mount_adapter(cache_session))
+
+@st.cache_resource
+def _get_geocoding_session():
+    """
+    Persistent on-disk cache for geocoding lookups. A city's coordinates
+    practically never change, so results are kept for a week.
+    """
+    geo_session = requests_cache.CachedSession('.geo_cache', expire_after=86400 * 7, allowable_methods=('GET',))
+    return _mount_adapter(geo_session)
+
+# --- Hourly Forecast Variables ---
+# Variables the dashboard actually renders; fetched on every load
+HOURLY_VARS = [
+    "temperature_2m", "weather_code", "precipitation_probability", "wind_speed_10m", "apparent_temperature",
+    "soil_temperature_0cm", "soil_temperature_6cm", "soil_temperature_18cm", "soil_temperature_54cm",
+    "soil_moisture_0_to_1cm", "soil_moisture_1_to_3cm", "soil_moisture_3_to_9cm", 
+    "soil_moisture_9_to_27cm", "soil_moisture_27_to_81cm"
+]
+# Every hourly variable, in the original API order; only fetched for the raw data view on request
+HOURLY_ALL_VARS = [
+    "temperature_2m", "relative_humidity_2m", "weather_code", "pressure_msl", "surface_pressure", 
+    "dew_point_2m", "precipitation", "precipitation_probability", "cloud_cover", 
+    "visibility", "wind_speed_10m", "wind_gusts_10m", "apparent_temperature",
+    "soil_temperature_0cm", "soil_temperature_6cm", "soil_temperature_18cm", "soil_temperature_54cm",
+    "soil_moisture_0_to_1cm", "soil_moisture_1_to_3cm", "soil_moisture_3_to_9cm", 
+    "soil_moisture_9_to_27cm", "soil_moisture_27_to_81cm"
+]
+
 # --- Geocoding Function ---
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=3600)  # In-process layer on top of the on-disk geocoding cache
 def geocode_city(city_name):
     """
     (Name -> Coords) Uses the Open-Meteo Geocoding API to find coords for a city.
@@ -50,7 +125,7 @@ def geocode_city(city_name):
     url = "https://geocoding-api.open-meteo.com/v1/search"
     params = {"name": city_name, "count": 1, "format": "json"}
     try:
-        response = requests.get(url, params=params)
+        response = _get_geocoding_session().get(url, params=params, timeout=5)
         response.raise_for_status()  # Raise an error for bad status codes
         data = response.json()
         
@@ -77,143 +152,191 @@ def geocode_city(city_name):
         st.error(f"Geocoding API error: {e}")
         return None
 
-# --- Weather API Client Class ---
-class WeatherApiClient:
+# --- Weather API Functions ---
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+FORECAST_TTL = 900  # Seconds processed forecasts stay in the Streamlit cache
+
+def _get_params(latitude, longitude, hourly_vars, include_current_daily=True):
+    """Returns the dictionary of parameters for the API call."""
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "auto",
+        "hourly": hourly_vars,
+    }
+    if include_current_daily:
+        params["daily"] = [
+            "weather_code", "temperature_2m_max", "temperature_2m_min", "apparent_temperature_max", 
+            "apparent_temperature_min", "sunset", "sunrise", "precipitation_sum", 
+            "precipitation_probability_max", "wind_speed_10m_max", "uv_index_max"
+        ]
+        params["current"] = [
+            "temperature_2m", "relative_humidity_2m", "apparent_temperature", "is_day", "precipitation", 
+            "weather_code", "cloud_cover", "wind_speed_10m", "wind_gusts_10m", "uv_index"
+        ]
+    return params
+
+def fetch_weather(client, params):
+    """Fetches weather data from the API."""
+    responses = client.weather_api(FORECAST_URL, params=params)
+    return responses[0]
+
+def _process_location_data(response):
+    """Extracts location metadata from the response."""
+    
+    # Decode bytes to string for timezone and abbreviation
+    tz_bytes = response.Timezone()
+    tz_abbrev_bytes = response.TimezoneAbbreviation()
+    
+    timezone_str = tz_bytes.decode('utf-8') if isinstance(tz_bytes, bytes) else tz_bytes
+    timezone_abbrev_str = tz_abbrev_bytes.decode('utf-8') if isinstance(tz_abbrev_bytes, bytes) else tz_abbrev_bytes
+
+    return {
+        "latitude": response.Latitude(),
+        "longitude": response.Longitude(),
+        "elevation": response.Elevation(),
+        "timezone": timezone_str,
+        "timezone_abbreviation": timezone_abbrev_str
+    }
+
+def _process_current_data(response, current_vars):
+    """Processes the current weather data dynamically."""
+    current = response.Current()
+    current_data = {
+        "time": pd.to_datetime(current.Time(), unit="s", utc=True)
+    }
+    get_variable = current.Variables  # Bind once rather than per variable
+    for i, var in enumerate(current_vars):
+        current_data[var] = get_variable(i).Value()
+    return current_data
+
+def _time_index(block):
+    """Builds the UTC DatetimeIndex for an hourly/daily block straight from epoch nanoseconds."""
+    ns = 10**9
+    stamps = np.arange(block.Time() * ns, block.TimeEnd() * ns, block.Interval() * ns, dtype=np.int64)
+    return pd.DatetimeIndex(stamps.view("datetime64[ns]"), tz="UTC")
+
+def _process_hourly_data(response, hourly_vars):
+    """Processes the hourly forecast data dynamically."""
+    hourly = response.Hourly()
+    n = int((hourly.TimeEnd() - hourly.Time()) / hourly.Interval())
+
+    # Fill one 2D block instead of building the frame column by column.
+    # Fortran order keeps every column contiguous for the per-column reads below.
+    arr = np.empty((n, len(hourly_vars)), dtype=np.float32, order="F")
+    get_variable = hourly.Variables  # Bind once rather than per variable
+    for i in range(len(hourly_vars)):
+        arr[:, i] = get_variable(i).ValuesAsNumpy()
+
+    hourly_dataframe = pd.DataFrame(arr, columns=hourly_vars, dtype=np.float32, copy=False)
+    hourly_dataframe.insert(0, "date", _time_index(hourly))
+    return hourly_dataframe
+
+def _process_daily_data(response, daily_vars):
+    """Processes the daily forecast data dynamically."""
+    daily = response.Daily()
+    n = int((daily.TimeEnd() - daily.Time()) / daily.Interval())
+
+    # Numeric variables share one 2D block; sunrise/sunset are int64 timestamps
+    value_vars = [var for var in daily_vars if var not in ("sunrise", "sunset")]
+    arr = np.empty((n, len(value_vars)), dtype=np.float32, order="F")
+    timestamps = {}
+    get_variable = daily.Variables  # Bind once rather than per variable
+    j = 0
+    for i, var in enumerate(daily_vars):
+        if var in ("sunrise", "sunset"):
+            timestamps[var] = get_variable(i).ValuesInt64AsNumpy()
+        else:
+            arr[:, j] = get_variable(i).ValuesAsNumpy()
+            j += 1
+
+    daily_dataframe = pd.DataFrame(arr, columns=value_vars, dtype=np.float32, copy=False)
+    daily_dataframe.insert(0, "date", _time_index(daily))
+
+    # Convert timestamp columns to datetime in their own frame so the float32 block is left untouched,
+    # then restore the API's column order
+    if timestamps:
+        timestamp_df = pd.DataFrame({
+            var: pd.to_datetime(values, unit="s", utc=True) for var, values in timestamps.items()
+        })
+        daily_dataframe = pd.concat([daily_dataframe, timestamp_df], axis=1)[["date", *daily_vars]]
+
+    return daily_dataframe
+
+@st.cache_data(ttl=FORECAST_TTL, show_spinner=False)
+def fetch_processed(latitude, longitude):
     """
-    A class to fetch and process weather data from the Open-Meteo API.
+    Fetches and processes all weather data.
+    Returns:
+        tuple: (location_info, current_data, hourly_dataframe, daily_dataframe)
     """
-    def __init__(self, latitude, longitude):
-        self.latitude = latitude
-        self.longitude = longitude
-        self.url = "https://api.open-meteo.com/v1/forecast"
-        
-        # Setup the Open-Meteo API client
-        cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-        self.openmeteo = openmeteo_requests.Client(session=retry_session)
-
-    def _get_params(self):
-        """Returns the dictionary of parameters for the API call."""
-        return {
-            "latitude": self.latitude,
-            "longitude": self.longitude,
-            "timezone": "auto",
-            "daily": [
-                "weather_code", "temperature_2m_max", "temperature_2m_min", "apparent_temperature_max", 
-                "apparent_temperature_min", "sunset", "sunrise", "precipitation_sum", 
-                "precipitation_probability_max", "wind_speed_10m_max", "uv_index_max"
-            ],
-            "hourly": [
-                "temperature_2m", "relative_humidity_2m", "weather_code", "pressure_msl", "surface_pressure", 
-                "dew_point_2m", "precipitation", "precipitation_probability", "cloud_cover", 
-                "visibility", "wind_speed_10m", "wind_gusts_10m", "apparent_temperature",
-                "soil_temperature_0cm", "soil_temperature_6cm", "soil_temperature_18cm", "soil_temperature_54cm",
-                "soil_moisture_0_to_1cm", "soil_moisture_1_to_3cm", "soil_moisture_3_to_9cm", 
-                "soil_moisture_9_to_27cm", "soil_moisture_27_to_81cm"
-            ],
-            "current": [
-                "temperature_2m", "relative_humidity_2m", "apparent_temperature", "is_day", "precipitation", 
-                "weather_code", "cloud_cover", "wind_speed_10m", "wind_gusts_10m", "uv_index"
-            ],
-        }
-
-    def fetch_weather(self):
-        """Fetches weather data from the API."""
-        params = self._get_params()
-        responses = self.openmeteo.weather_api(self.url, params=params)
-        return responses[0], params
-
-    def _process_location_data(self, response):
-        """Extracts location metadata from the response."""
-        
-        # Decode bytes to string for timezone and abbreviation
-        tz_bytes = response.Timezone()
-        tz_abbrev_bytes = response.TimezoneAbbreviation()
-        
-        timezone_str = tz_bytes.decode('utf-8') if isinstance(tz_bytes, bytes) else tz_bytes
-        timezone_abbrev_str = tz_abbrev_bytes.decode('utf-8') if isinstance(tz_abbrev_bytes, bytes) else tz_abbrev_bytes
-
-        return {
-            "latitude": response.Latitude(),
-            "longitude": response.Longitude(),
-            "elevation": response.Elevation(),
-            "timezone": timezone_str,
-            "timezone_abbreviation": timezone_abbrev_str
-        }
-
-    def _process_current_data(self, response, current_vars):
-        """Processes the current weather data dynamically."""
-        current = response.Current()
-        current_data = {
-            "time": pd.to_datetime(current.Time(), unit="s", utc=True)
-        }
-        for i, var in enumerate(current_vars):
-            current_data[var] = current.Variables(i).Value()
-        return current_data
-
-    def _process_hourly_data(self, response, hourly_vars):
-        """Processes the hourly forecast data dynamically."""
-        hourly = response.Hourly()
-        hourly_data = {"date": pd.date_range(
-            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=hourly.Interval()),
-            inclusive="left"
-        )}
-        
-        for i, var in enumerate(hourly_vars):
-            hourly_data[var] = hourly.Variables(i).ValuesAsNumpy()
-            
-        return pd.DataFrame(data=hourly_data)
-
-    def _process_daily_data(self, response, daily_vars):
-        """Processes the daily forecast data dynamically."""
-        daily = response.Daily()
-        daily_data = {"date": pd.date_range(
-            start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-            end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=daily.Interval()),
-            inclusive="left"
-        )}
-
-        for i, var in enumerate(daily_vars):
-            if var in ["sunrise", "sunset"]:
-                daily_data[var] = daily.Variables(i).ValuesInt64AsNumpy()
-            else:
-                daily_data[var] = daily.Variables(i).ValuesAsNumpy()
+    params = _get_params(latitude, longitude, HOURLY_VARS)
+    response = fetch_weather(_get_openmeteo_client(), params)
+    
+    location_info = _process_location_data(response)
+    current_data = _process_current_data(response, params["current"])
+    hourly_df = _process_hourly_data(response, params["hourly"])
+    daily_df = _process_daily_data(response, params["daily"])
+    
+    return location_info, current_data, hourly_df, daily_df
 
-        daily_dataframe = pd.DataFrame(data=daily_data)
-        
-        # Convert timestamp columns to datetime
-        if "sunrise" in daily_dataframe:
-            daily_dataframe["sunrise"] = pd.to_datetime(daily_dataframe["sunrise"], unit="s", utc=True)
-        if "sunset" in daily_dataframe:
-            daily_dataframe["sunset"] = pd.to_datetime(daily_dataframe["sunset"], unit="s", utc=True)
-            
-        return daily_dataframe
-
-    def get_processed_data(self):
-        """
-        Fetches and processes all weather data.
-        Returns:
-            tuple: (location_info, current_data, hourly_dataframe, daily_dataframe)
-        """
-        response, params = self.fetch_weather()
-        
-        location_info = self._process_location_data(response)
-        current_data = self._process_current_data(response, params["current"])
-        hourly_df = self._process_hourly_data(response, params["hourly"])
-        daily_df = self._process_daily_data(response, params["daily"])
-        
-        return location_info, current_data, hourly_df, daily_df
+@st.cache_data(ttl=FORECAST_TTL, show_spinner=False)
+def fetch_full_hourly(latitude, longitude):
+    """
+    Fetches every hourly variable, including those the dashboard doesn't plot.
+    Only requested on demand for the raw data view.
+    """
+    params = _get_params(latitude, longitude, HOURLY_ALL_VARS, include_current_daily=False)
+    response = fetch_weather(_get_openmeteo_client(), params)
+    return _process_hourly_data(response, HOURLY_ALL_VARS)
+
+def grid_coords(latitude, longitude):
+    """Rounds coordinates to a ~100 m grid so geocoding drift reuses the same cache entry."""
+    return round(latitude, 3), round(longitude, 3)
+
+# --- Display Helpers ---
+HOURLY_TREND_LABELS = {
+    'temperature_2m': 'Temp (°C)', 'apparent_temperature': 'Feels Like (°C)',
+    'precipitation_probability': 'Precip. Prob. (%)', 'wind_speed_10m': 'Wind (km/h)'
+}
+SOIL_TEMP_LABELS = {
+    'soil_temperature_0cm': '0cm', 'soil_temperature_6cm': '6cm',
+    'soil_temperature_18cm': '18cm', 'soil_temperature_54cm': '54cm'
+}
+SOIL_MOISTURE_LABELS = {
+    'soil_moisture_0_to_1cm': '0-1cm', 'soil_moisture_1_to_3cm': '1-3cm',
+    'soil_moisture_3_to_9cm': '3-9cm', 'soil_moisture_9_to_27cm': '9-27cm', 'soil_moisture_27_to_81cm': '27-81cm'
+}
+
+def hourly_chart_df(hourly_df, labels):
+    """Returns the hourly columns in `labels`, renamed to their display names, for st.line_chart."""
+    return hourly_df[['date', *labels]].rename(columns=labels)
+
+# The daily frame is only ~7 rows, so Streamlit hashes it cheaply and the cached
+# figure is keyed on the exact data it plots; widget reruns reuse the built figure
+@st.cache_data(ttl=FORECAST_TTL, show_spinner=False)
+def build_daily_temp_fig(daily_df):
+    """Daily max/min temperature trend."""
+    fig = px.line(daily_df, x='date', y=['temperature_2m_max', 'temperature_2m_min'],
+                  title="Daily Max/Min Temperature Trend", labels={'value': 'Temperature (°C)', 'variable': 'Metric'}, markers=True)
+    fig.update_layout(legend_title_text='')
+    return fig
 
 # --- Main Dashboard Function ---
-def display_weather_dashboard(geo_info):
-    """Renders the entire weather dashboard given geo_info."""
+def display_weather_dashboard(geo_info, warmup=None, warmup_coords=None):
+    """
+    Renders the entire weather dashboard given geo_info.
+    `warmup` is an optional future warming the HTTP cache for `warmup_coords`; it is
+    waited on when those match the geocoded coordinates on the rounded grid.
+    """
     try:
         with st.spinner(f"Fetching weather for {geo_info['display_name']}..."):
-            client = WeatherApiClient(latitude=geo_info["latitude"], longitude=geo_info["longitude"])
-            info, current, hourly_df, daily_df = client.get_processed_data()
+            coords = grid_coords(geo_info["latitude"], geo_info["longitude"])
+            if warmup is not None and warmup_coords == coords:
+                # Let the in-flight request land so the read below is an HTTP cache hit;
+                # any error surfaces again from fetch_processed
+                wait([warmup])
+            info, current, hourly_df, daily_df = fetch_processed(*coords)
 
         # 2. Display Location Info & Live Time
         st.header(f"Weather for {geo_info['display_name']}")
@@ -226,7 +349,7 @@ def display_weather_dashboard(geo_info):
 
         # 3. Display Current Weather (Revamped)
         st.header("Current Weather")
-        weather_desc = WMO_CODES.get(int(current['weather_code']), "N/A")
+        weather_desc = WMO_DESC[int(wmo_index(current['weather_code']))]
         
         col1, col2, col3 = st.columns(3)
         col1.metric("Status", weather_desc)
@@ -246,78 +369,85 @@ def display_weather_dashboard(geo_info):
         
         # Get current time in the location's timezone
         local_tz = info['timezone']
-        now_local = pd.to_datetime('now', utc=True).tz_convert(local_tz)
+        now_local = pd.Timestamp.now(tz=local_tz)
+
+        # Binary-search the sorted UTC timestamps for the current hour, then localize only the 8 rows shown
+        now_utc = now_local.tz_convert('UTC').tz_localize(None).to_datetime64()
+        start = hourly_df['date'].values.searchsorted(now_utc)
+        next_hours_df = hourly_df.iloc[start:start + 8].copy()
+        next_hours_df['date_local'] = next_hours_df['date'].dt.tz_convert(local_tz)
 
-        # Filter hourly data to start from the current hour
-        hourly_df['date_local'] = hourly_df['date'].dt.tz_convert(local_tz)
-        next_hours_df = hourly_df[hourly_df['date_local'] >= now_local].head(8)
+        # Pull the displayed columns out as flat arrays once instead of building a namedtuple per row
+        times = next_hours_df['date_local'].dt.strftime('%I %p').to_numpy() # 12-hour format
+        icons = WMO_ICON[wmo_index(next_hours_df['weather_code'].to_numpy())]
+        temps = next_hours_df['temperature_2m'].to_numpy(np.float32)
+        winds = next_hours_df['wind_speed_10m'].to_numpy(np.float32)
+        precips = next_hours_df['precipitation_probability'].to_numpy(np.float32)
 
         cols = st.columns(8)
-        for i, (col, row) in enumerate(zip(cols, next_hours_df.itertuples())):
-            with col.container(border=True):
-                st.markdown(f"**{row.date_local.strftime('%I %p')}**") # 12-hour format
-                icon = WMO_CODES.get(int(row.weather_code), "❓").split(" ")[0]
-                st.markdown(f"<div style='font-size: 30px; text-align: center;'>{icon}</div>", unsafe_allow_html=True)
-                st.metric("Temp", f"{row.temperature_2m:.0f}°")
-                st.markdown(f"**{row.wind_speed_10m:.0f}** km/h")
-                st.markdown(f"**{row.precipitation_probability:.0f}** %")
+        for i in range(len(next_hours_df)):
+            with cols[i].container(border=True):
+                st.markdown(f"**{times[i]}**")
+                st.markdown(f"<div style='font-size: 30px; text-align: center;'>{icons[i]}</div>", unsafe_allow_html=True)
+                st.metric("Temp", f"{temps[i]:.0f}°")
+                st.markdown(f"**{winds[i]:.0f}** km/h")
+                st.markdown(f"**{precips[i]:.0f}** %")
 
         # 5. Display Hourly Forecast Trend
         st.header("Hourly Forecast Trend")
-        hourly_df_display = hourly_df[['date', 'temperature_2m', 'apparent_temperature', 'precipitation_probability', 'wind_speed_10m']]
-        hourly_df_display = hourly_df_display.rename(columns={
-            'temperature_2m': 'Temp (°C)', 'apparent_temperature': 'Feels Like (°C)',
-            'precipitation_probability': 'Precip. Prob. (%)', 'wind_speed_10m': 'Wind (km/h)'
-        })
+        hourly_df_display = hourly_chart_df(hourly_df, HOURLY_TREND_LABELS)
         st.line_chart(hourly_df_display, x='date')
         
         # 6. Display Soil Data
         st.header("Hourly Soil Data")
         col_soil_1, col_soil_2 = st.columns(2)
         with col_soil_1:
-            soil_temp_df = hourly_df[['date', 'soil_temperature_0cm', 'soil_temperature_6cm', 'soil_temperature_18cm', 'soil_temperature_54cm']]
-            soil_temp_df = soil_temp_df.rename(columns={
-                'soil_temperature_0cm': '0cm', 'soil_temperature_6cm': '6cm',
-                'soil_temperature_18cm': '18cm', 'soil_temperature_54cm': '54cm'
-            })
-            fig_soil_temp = px.line(soil_temp_df, x='date', y=soil_temp_df.columns[1:],
-                                    title="Hourly Soil Temperature (°C) at Depth", labels={'value': 'Temp (°C)', 'variable': 'Depth'})
-            st.plotly_chart(fig_soil_temp, use_container_width=True)
+            st.markdown("**Hourly Soil Temperature (°C) at Depth**")
+            st.line_chart(hourly_chart_df(hourly_df, SOIL_TEMP_LABELS), x='date', y_label='Temp (°C)')
         with col_soil_2:
-            soil_moisture_df = hourly_df[['date', 'soil_moisture_0_to_1cm', 'soil_moisture_1_to_3cm', 'soil_moisture_3_to_9cm', 'soil_moisture_9_to_27cm', 'soil_moisture_27_to_81cm']]
-            soil_moisture_df = soil_moisture_df.rename(columns={
-                'soil_moisture_0_to_1cm': '0-1cm', 'soil_moisture_1_to_3cm': '1-3cm',
-                'soil_moisture_3_to_9cm': '3-9cm', 'soil_moisture_9_to_27cm': '9-27cm', 'soil_moisture_27_to_81cm': '27-81cm'
-            })
-            fig_soil_moisture = px.line(soil_moisture_df, x='date', y=soil_moisture_df.columns[1:],
-                                        title="Hourly Soil Moisture (m³/m³) at Depth", labels={'value': 'Moisture (m³/m³)', 'variable': 'Depth'})
-            st.plotly_chart(fig_soil_moisture, use_container_width=True)
+            st.markdown("**Hourly Soil Moisture (m³/m³) at Depth**")
+            st.line_chart(hourly_chart_df(hourly_df, SOIL_MOISTURE_LABELS), x='date', y_label='Moisture (m³/m³)')
 
         # 7. Daily Forecast Section
         st.header("Daily Forecast")
-        fig_daily_temp = px.line(daily_df, x='date', y=['temperature_2m_max', 'temperature_2m_min'],
-                                 title="Daily Max/Min Temperature Trend", labels={'value': 'Temperature (°C)', 'variable': 'Metric'}, markers=True)
-        fig_daily_temp.update_layout(legend_title_text='')
+        fig_daily_temp = build_daily_temp_fig(daily_df)
         st.plotly_chart(fig_daily_temp, use_container_width=True)
         st.subheader("7-Day Outlook")
         daily_df_display = daily_df.head(7).copy()
-        daily_df_display['day_name'] = daily_df_display['date'].dt.tz_convert(info['timezone']).dt.strftime('%A')
-        daily_df_display['date_str'] = daily_df_display['date'].dt.tz_convert(info['timezone']).dt.strftime('%b %d')
-        daily_df_display['weather_desc'] = daily_df_display['weather_code'].map(WMO_CODES).fillna("N/A")
-        daily_df_display['weather_icon'] = daily_df_display['weather_desc'].apply(lambda x: x.split(" ")[0])
+        daily_local = daily_df_display['date'].dt.tz_convert(local_tz)
+        daily_df_display['day_name'] = daily_local.dt.strftime('%A')
+        daily_df_display['date_str'] = daily_local.dt.strftime('%b %d')
+        daily_codes = wmo_index(daily_df_display['weather_code'].to_numpy())
+        daily_df_display['weather_desc'] = WMO_DESC[daily_codes]
+        daily_df_display['weather_icon'] = WMO_ICON[daily_codes]
+
+        day_names = daily_df_display['day_name'].to_numpy()
+        date_strs = daily_df_display['date_str'].to_numpy()
+        descs = daily_df_display['weather_desc'].to_numpy()
+        icons = daily_df_display['weather_icon'].to_numpy()
+        temp_maxes = daily_df_display['temperature_2m_max'].to_numpy(np.float32)
+        temp_mins = daily_df_display['temperature_2m_min'].to_numpy(np.float32)
+        precips = daily_df_display['precipitation_probability_max'].to_numpy(np.float32)
+        winds = daily_df_display['wind_speed_10m_max'].to_numpy(np.float32)
 
         cols = st.columns(7)
-        for i, (col, row) in enumerate(zip(cols, daily_df_display.itertuples())):
-            with col.container(border=True):
-                st.markdown(f"**{row.day_name}**", help=row.weather_desc)
-                st.markdown(f"*{row.date_str}*")
-                st.markdown(f"<div style='font-size: 42px; text-align: center;'>{row.weather_icon}</div>", unsafe_allow_html=True)
-                st.metric("Temp", f"{row.temperature_2m_max:.0f}° / {row.temperature_2m_min:.0f}°")
-                st.markdown(f"**Precip:** {row.precipitation_probability_max:.0f}%")
-                st.markdown(f"**Wind:** {row.wind_speed_10m_max:.0f} km/h")
+        for i in range(len(daily_df_display)):
+            with cols[i].container(border=True):
+                st.markdown(f"**{day_names[i]}**", help=descs[i])
+                st.markdown(f"*{date_strs[i]}*")
+                st.markdown(f"<div style='font-size: 42px; text-align: center;'>{icons[i]}</div>", unsafe_allow_html=True)
+                st.metric("Temp", f"{temp_maxes[i]:.0f}° / {temp_mins[i]:.0f}°")
+                st.markdown(f"**Precip:** {precips[i]:.0f}%")
+                st.markdown(f"**Wind:** {winds[i]:.0f} km/h")
 
         # 8. Raw Data Expanders
-        with st.expander("View Full Hourly Raw Data"): st.dataframe(hourly_df)
+        with st.expander("Hourly Raw Data (plotted variables)"):
+            # One-shot load: the expander body runs on every rerun even when collapsed, so a button
+            # (True only for the run it triggers) keeps the full payload off the normal render path
+            if st.button("Load all hourly variables", help="Shows every hourly variable for this run only"):
+                st.dataframe(fetch_full_hourly(*coords))
+            else:
+                st.dataframe(hourly_df)
         with st.expander("View Full Daily Raw Data"): st.dataframe(daily_df)
             
     except Exception as e:
@@ -336,13 +466,38 @@ if st.sidebar.button("Get Weather"):
     if not city_input:
         st.sidebar.error("Please enter a city name.")
     else:
-        with st.spinner(f"Locating '{city_input}'..."):
-            geo_info = geocode_city(city_input)
-        
-        if geo_info is None:
-            st.error(f"Could not find city: '{city_input}'. Please check the spelling.")
-        else:
-            # If city is found, display the dashboard
-            display_weather_dashboard(geo_info)
+        # Remember where each city resolved to, so a repeat lookup can start the
+        # forecast request while the geocoding call re-verifies the coordinates
+        city_coords = st.session_state.setdefault("city_coords", {})
+        city_key = city_input.strip().lower()
+
+        # Forecasts are always read through fetch_processed on the script thread; the worker only
+        # warms the on-disk HTTP cache with the same request, and makes no Streamlit calls
+        executor = warmup = warmup_coords = None
+        if city_key in city_coords:
+            warmup_coords = city_coords[city_key]
+            params = _get_params(*warmup_coords, HOURLY_VARS)
+            executor = ThreadPoolExecutor(max_workers=1)
+            warmup = executor.submit(fetch_weather, _get_openmeteo_client(), params)
+
+        try:
+            with st.spinner(f"Locating '{city_input}'..."):
+                geo_info = geocode_city(city_input)
+
+            if geo_info is None:
+                st.session_state.pop("geo_info", None)
+                st.error(f"Could not find city: '{city_input}'. Please check the spelling.")
+            else:
+                city_coords[city_key] = grid_coords(geo_info["latitude"], geo_info["longitude"])
+                st.session_state["geo_info"] = geo_info
+                # If city is found, display the dashboard
+                display_weather_dashboard(geo_info, warmup, warmup_coords)
+        finally:
+            if executor is not None:
+                # Don't hold up the script run on a speculative request that went unused
+                executor.shutdown(wait=False, cancel_futures=True)
+elif "geo_info" in st.session_state:
+    # Keep the last dashboard on screen across widget reruns (e.g. loading all hourly variables)
+    display_weather_dashboard(st.session_state["geo_info"])
 else:
     st.info("Enter a city name in the sidebar and click 'Get Weather' to load the dashboard.")
\ No newline at end of file